@@ -1,10 +1,38 @@
 import os
+import re
 import json
 import time
+import shutil
+import threading
 import requests
-import pandas as pd
-from datetime import datetime, timedelta
-from sec_edgar_downloader import Downloader
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+# 复用 Session 的连接池，避免每只股票、每个文件都重新建立 TCP 连接
+# requests.Session 未声明线程安全，公告列表又是并发拉取的，所以每个线程各用一个 Session
+_thread_local = threading.local()
+
+def get_session():
+    session = getattr(_thread_local, 'session', None)
+    if session is None:
+        session = _thread_local.session = requests.Session()
+    return session
+
+# (连接超时, 读取超时)，避免卡住的连接拖住整个运行
+REQUEST_TIMEOUT = (5, 30)
+
+# 并发查询公告列表的线程数。每个线程内 topSearch 与 hisAnnouncement 依次发出，
+# 同一时刻最多 2 个请求在途（原先为 1 个）；文件下载仍在主线程串行并间隔 1 秒
+CNINFO_MAX_WORKERS = 2
+
+# 巨潮资讯接口请求头，所有查询共用
+CNINFO_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
+    "Content-Type": "application/x-www-form-urlencoded; charset=UTF-8",
+    "Accept": "application/json, text/javascript, */*; q=0.01",
+    "Origin": "http://www.cninfo.com.cn",
+    "Referer": "http://www.cninfo.com.cn/new/commonUrl/pageOfSearch?url=disclosure/list/search&lastPage=index"
+}
 
 # 加载配置
 def load_config():
@@ -22,19 +50,79 @@ def get_stock_type(code):
         return 'US' # 美股
     return 'UNKNOWN'
 
+# 股票代码 -> orgId 的缓存，同一只股票只查询一次
+_org_id_cache = {}
+
+# 通过巨潮资讯搜索接口获取 orgId
+# 注意：港股的 orgId 获取可能需要特定的搜索接口
+def get_cninfo_org_id(stock_code):
+    if stock_code in _org_id_cache:
+        return _org_id_cache[stock_code]
+
+    try:
+        query_url = "http://www.cninfo.com.cn/new/information/topSearch/query"
+        query_data = {"keyWord": stock_code}
+        q_res = get_session().post(query_url, data=query_data, headers=CNINFO_HEADERS, timeout=REQUEST_TIMEOUT)
+        if q_res.status_code != 200:
+            return None
+        org_id = None
+        for item in q_res.json() or []:
+            if item['code'] == stock_code:
+                org_id = item['orgId']
+                break
+        # 查询成功但没有匹配的代码时也缓存 None，本次运行内不再重复查询；
+        # 只有非 200 响应和异常不缓存，之后会重试
+        _org_id_cache[stock_code] = org_id
+        return org_id
+    except Exception as e:
+        print(f"获取 {stock_code} 的 orgId 失败: {e}")
+        return None
+
+# orgId 持久化缓存，重复运行可跳过搜索请求
+# 港股代码退市后可能被复用，缓存超过有效期即重新查询；删除缓存文件可立即强制刷新
+ORG_ID_CACHE_TTL_DAYS = 30
+
+# 载入仍在有效期内的缓存条目，返回 {code: {'org_id': ..., 'cached_at': 'YYYY-MM-DD'}}
+def load_org_id_cache(cache_path):
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            entries = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(entries, dict):
+        return {}
+
+    cutoff = datetime.now() - timedelta(days=ORG_ID_CACHE_TTL_DAYS)
+    loaded = {}
+    for code, entry in entries.items():
+        try:
+            if not isinstance(entry['org_id'], str):
+                continue
+            if datetime.strptime(entry['cached_at'], '%Y-%m-%d') < cutoff:
+                continue
+        except (TypeError, KeyError, ValueError):
+            continue
+        loaded[code] = entry
+    return loaded
+
+# org_ids 为内存中的 {code: orgId}，loaded 为 load_org_id_cache 的返回值
+def save_org_id_cache(cache_path, org_ids, loaded):
+    # 只有本次新查到 orgId 时才写文件；未找到的代码不落盘，下次运行仍会重新查询
+    today = datetime.now().strftime('%Y-%m-%d')
+    fresh = {code: {'org_id': org_id, 'cached_at': today}
+             for code, org_id in org_ids.items()
+             if org_id and code not in loaded}
+    if not fresh:
+        return
+    try:
+        with open(cache_path, 'w', encoding='utf-8') as f:
+            json.dump({**loaded, **fresh}, f, ensure_ascii=False, indent=4)
+    except OSError as e:
+        print(f"保存 orgId 缓存失败: {e}")
+
 # A股和港股: 获取巨潮资讯的公告数据
-def get_cninfo_announcements(stock_code, stock_type, lookback_days=30):
+def get_cninfo_announcements(stock_code, stock_type, start_date, end_date):
     url = "http://www.cninfo.com.cn/new/hisAnnouncement/query"
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
-        "Content-Type": "application/x-www-form-urlencoded; charset=UTF-8",
-        "Accept": "application/json, text/javascript, */*; q=0.01",
-        "Origin": "http://www.cninfo.com.cn",
-        "Referer": "http://www.cninfo.com.cn/new/commonUrl/pageOfSearch?url=disclosure/list/search&lastPage=index"
-    }
-    
-    end_date = datetime.now()
-    start_date = end_date - timedelta(days=lookback_days)
     
     data = {
         "pageNum": 1,
@@ -65,34 +153,23 @@ def get_cninfo_announcements(stock_code, stock_type, lookback_days=30):
         data['category'] = "" # 港股分类可能不同，先不限制
         
     # 尝试获取 orgId
-    # 注意：港股的 orgId 获取可能需要特定的搜索接口
-    try:
-        query_url = "http://www.cninfo.com.cn/new/information/topSearch/query"
-        query_data = {"keyWord": stock_code}
-        q_res = requests.post(query_url, data=query_data, headers=headers)
-        if q_res.status_code == 200:
-            q_json = q_res.json()
-            if q_json and len(q_json) > 0:
-                for item in q_json:
-                    if item['code'] == stock_code:
-                        data['stock'] = f"{item['code']},{item['orgId']}"
-                        break
-    except Exception as e:
-        print(f"获取 orgId 失败: {e}")
+    org_id = get_cninfo_org_id(stock_code)
+    if org_id:
+        data['stock'] = f"{stock_code},{org_id}"
 
     # 如果没找到 orgId，对于港股可能无法直接搜索，但试一试
     if not data['stock']:
         data['stock'] = stock_code
 
     try:
-        response = requests.post(url, data=data, headers=headers)
+        response = get_session().post(url, data=data, headers=CNINFO_HEADERS, timeout=REQUEST_TIMEOUT)
         if response.status_code == 200:
             return response.json().get('announcements', [])
         else:
-            print(f"请求失败: {response.status_code}")
+            print(f"{stock_code} 公告请求失败: {response.status_code}")
             return []
     except Exception as e:
-        print(f"请求异常: {e}")
+        print(f"{stock_code} 公告请求异常: {e}")
         return []
 
 # 下载文件 (通用)
@@ -102,29 +179,43 @@ def download_file(url, save_path):
         return
     
     print(f"正在下载: {url} -> {save_path}")
+    # 先写入 .part 临时文件，完整下载后再改名；中途超时或出错不会留下被当作"已存在"的残缺文件
+    part_path = save_path + '.part'
     try:
-        r = requests.get(url, stream=True)
-        if r.status_code == 200:
-            with open(save_path, 'wb') as f:
-                for chunk in r.iter_content(chunk_size=8192):
-                    f.write(chunk)
-            print("下载完成")
-        else:
-            print(f"下载失败: {r.status_code}")
+        # with 保证流式响应被关闭，连接能回到 Session 的连接池
+        with get_session().get(url, stream=True, timeout=REQUEST_TIMEOUT) as r:
+            if r.status_code == 200:
+                with open(part_path, 'wb') as f:
+                    for chunk in r.iter_content(chunk_size=64 * 1024):
+                        f.write(chunk)
+                os.replace(part_path, save_path)
+                print("下载完成")
+            else:
+                print(f"下载失败: {r.status_code}")
     except Exception as e:
         print(f"下载出错: {e}")
+        try:
+            os.remove(part_path)
+        except OSError:
+            pass
 
 # 美股下载逻辑
-def download_us_reports(ticker, save_dir, email, lookback_days=30):
+def download_us_reports(ticker, save_dir, email, start_date):
     print(f"正在检查美股: {ticker} (通过 SEC EDGAR)")
     if "example.com" in email:
         print("警告: 请在 config.json 中配置有效的 user_email 以使用 SEC 下载功能")
         return
 
+    # 仅美股需要，延迟导入以加快 A股/港股 的启动；未安装时只跳过美股，不中断其它股票
+    try:
+        from sec_edgar_downloader import Downloader
+    except ImportError:
+        print(f"未安装 sec-edgar-downloader，跳过美股: {ticker}")
+        return
     dl = Downloader("MyCompany", email, save_dir)
     
     # 计算日期
-    after_date = (datetime.now() - timedelta(days=lookback_days)).strftime('%Y-%m-%d')
+    after_date = start_date.strftime('%Y-%m-%d')
     
     try:
         # 下载 10-K (年报)
@@ -136,7 +227,6 @@ def download_us_reports(ticker, save_dir, email, lookback_days=30):
         print(f"下载了 {n_10q} 份 10-Q")
         
         # 整理文件：将 primary-document.html 复制到外层，方便查看
-        import shutil
         download_root = os.path.join(save_dir, "sec-edgar-filings", ticker)
         if os.path.exists(download_root):
             for root, dirs, files in os.walk(download_root):
@@ -172,10 +262,32 @@ def main():
     if not os.path.isabs(save_dir):
         save_dir = os.path.join(os.path.dirname(__file__), save_dir)
     
-    if not os.path.exists(save_dir):
-        os.makedirs(save_dir)
+    os.makedirs(save_dir, exist_ok=True)
+
+    # 每次运行只取一次当前时间，所有股票使用相同的查询区间
+    # 巨潮资讯的公告日期按北京时间 (UTC+8) 计，与运行机器的时区无关
+    end_date = datetime.now(timezone(timedelta(hours=8)))
+    start_date = end_date - timedelta(days=lookback_days)
         
+    # 关键词合并为一个预编译正则，每条公告只需扫描一次标题
+    keyword_pattern = re.compile('|'.join(map(re.escape, keywords))) if keywords else None
+
     print(f"开始检查 {len(stocks)} 只股票的财报...")
+
+    # 缓存放在程序目录而不是报告目录，避免混入下载的财报
+    org_id_cache_path = os.path.join(os.path.dirname(__file__), 'org_id_cache.json')
+    cached_entries = load_org_id_cache(org_id_cache_path)
+    _org_id_cache.update({code: entry['org_id'] for code, entry in cached_entries.items()})
+
+    # A股和港股的公告查询互不依赖，先并发拉取列表；下载仍按顺序进行并保持间隔
+    cninfo_codes = [code for code in stocks if get_stock_type(code) in ['A', 'HK']]
+    with ThreadPoolExecutor(max_workers=CNINFO_MAX_WORKERS) as executor:
+        results = executor.map(
+            lambda code: get_cninfo_announcements(code, get_stock_type(code), start_date, end_date),
+            cninfo_codes,
+        )
+        announcements_by_code = dict(zip(cninfo_codes, results))
+    save_org_id_cache(org_id_cache_path, _org_id_cache, cached_entries)
     
     for code in stocks:
         stock_type = get_stock_type(code)
@@ -184,12 +296,12 @@ def main():
         if stock_type == 'US':
             # 美股处理
             us_save_dir = os.path.join(save_dir, 'US_Stocks')
-            download_us_reports(code, us_save_dir, user_email, lookback_days)
+            download_us_reports(code, us_save_dir, user_email, start_date)
             continue
             
         elif stock_type in ['A', 'HK']:
             # A股和港股处理
-            announcements = get_cninfo_announcements(code, stock_type, lookback_days)
+            announcements = announcements_by_code[code]
             
             if not announcements:
                 print("未找到相关公告")
@@ -200,7 +312,7 @@ def main():
                 title = title.replace('<em>', '').replace('</em>', '')
                 
                 # 检查关键词
-                if any(kw in title for kw in keywords):
+                if keyword_pattern and keyword_pattern.search(title):
                     print(f"发现目标公告: {title}")
                     
                     adjunct_url = ann.get('adjunctUrl', '')
@@ -1,10 +1,12 @@
 import requests
 
+# Shared session so repeated requests reuse one keep-alive connection
+session = requests.Session()
+session.headers.update({"User-Agent": "Mozilla/5.0"})
+TIMEOUT = (3, 10)
+
 def test_hk():
     url = "http://www.cninfo.com.cn/new/hisAnnouncement/query"
-    headers = {
-        "User-Agent": "Mozilla/5.0"
-    }
     data = {
         "pageNum": 1,
         "pageSize": 30,
@@ -16,7 +18,7 @@ def test_hk():
         "seDate": "2024-01-01~2025-05-01",
         "isHLtitle": "true"
     }
-    resp = requests.post(url, data=data, headers=headers)
+    resp = session.post(url, data=data, timeout=TIMEOUT)
     print(resp.json())
 
 test_hk()
@@ -1,11 +1,15 @@
 import requests
 
+# Shared session so repeated requests reuse one keep-alive connection
+session = requests.Session()
+session.headers.update({"User-Agent": "Mozilla/5.0"})
+TIMEOUT = (3, 10)
+
 def test_hk_search():
     # 1. Search for OrgId
     query_url = "http://www.cninfo.com.cn/new/information/topSearch/query"
-    headers = {"User-Agent": "Mozilla/5.0"}
     query_data = {"keyWord": "00700"}
-    q_res = requests.post(query_url, data=query_data, headers=headers)
+    q_res = session.post(query_url, data=query_data, timeout=TIMEOUT)
     print("Search Result:", q_res.json())
     
     if not q_res.json():
@@ -26,7 +30,7 @@ def test_hk_search():
         "stock": stock_param,
         "seDate": "2024-01-01~2025-05-01",
     }
-    resp = requests.post(url, data=data, headers=headers)
+    resp = session.post(url, data=data, timeout=TIMEOUT)
     print("Announcements:", resp.json().get('announcements'))
 
 test_hk_search()